@@ -67,35 +67,18 @@ def exactlyOne(vars):
 # right divider at r,c+1
 
 class Square:
-    top = None
-    right = None
-    bottom = None
-    left = None
-    row = 0
-    col = 0
+    # Board creates n*n squares.  Avoid per-instance dictionaries
+    __slots__ = ('top', 'right', 'bottom', 'left', 'row', 'col')
 
-    # idDict: Dictionary of variable identifiers, indexed by (row, col, isHorizontal)
-    def __init__(self, row, col, idDict):
+    # hVar, vVar: Variable identifiers for horizontal and vertical dividers,
+    # indexed as [row][col].  None when divider not present
+    def __init__(self, row, col, hVar, vVar):
         self.row = row
         self.col = col
-        
-        if (row,col,True) in idDict:
-            self.top = idDict[(row,col,True)]
-        else:
-            self.top = None
-        if (row+1,col,True) in idDict:
-            self.bottom = idDict[(row+1,col,True)]
-        else:
-            self.bottom = None
-
-        if (row,col,False) in idDict:
-            self.left = idDict[(row,col,False)]
-        else:
-            self.left = None
-        if (row,col+1,False) in idDict:
-            self.right = idDict[(row,col+1,False)]
-        else:
-            self.right = None
+        self.top = hVar[row][col]
+        self.bottom = hVar[row+1][col]
+        self.left = vVar[row][col]
+        self.right = vVar[row][col+1]
 
     def doClauses(self, writer):
         allVars = [self.top, self.right, self.bottom, self.left]
@@ -103,14 +86,14 @@ class Square:
         clist = []
         if len(vars) > 1:  # Not chopped corner
             writer.doComment("Exactly one constraints for square %d,%d (%d variables)" % (self.row, self.col, len(vars)))
-            clauses = exactlyOne(vars)
-            for clause in clauses:
-                clist.append(writer.doClause(clause))
+            clist = writer.doClauses(exactlyOne(vars))
         return clist
 
 class Board:
-    # Variable ids, indexed by (row, col, isHorizontal)
-    idDict = {}
+    # Variable ids for horizontal dividers, indexed by [row][col].  Rows 0..n
+    hVar = []
+    # Variable ids for vertical dividers, indexed by [row][col].  Columns 0..n
+    vVar = []
     # Squares indexed by (row, col)
     squares = {}
     variableCount = 0
@@ -133,7 +116,8 @@ class Board:
         self.cnfWriter = writer.CnfWriter(variableCount, rootName, self.verbose)
         self.scheduleWriter = writer.ScheduleWriter(variableCount, rootName, self.verbose)
         self.orderWriter = writer.OrderWriter(variableCount, rootName, self.verbose)
-        self.idDict = {}
+        self.hVar = [[None] * n for r in range(n+1)]
+        self.vVar = [[None] * (n+1) for r in range(n)]
         self.squares = {}
         self.variableCount = 0
 
@@ -143,15 +127,12 @@ class Board:
 
     # Construct Column i.  Return lists of variables on left and right
     def doColumn(self, c):
-        left = []
-        right = []
-        quants = []
         self.scheduleWriter.doComment("Adding column %d" % c)
+        # Squares from bottom to top
+        column = [self.squares[(r,c)] for r in range(self.n-1, -1, -1)]
         # Has something been put onto the stack?
         gotValue = False
-        for ir in range(self.n):
-            r = self.n-ir-1
-            sq = self.squares[(r,c)]
+        for sq in column:
             clist = sq.doClauses(self.cnfWriter)
             if len(clist) > 0:
                 self.scheduleWriter.getClauses(clist)
@@ -159,12 +140,9 @@ class Board:
                 if count > 0:
                     self.scheduleWriter.doAnd(count)
                     gotValue = True
-            if sq.bottom is not None:
-                quants.append(sq.bottom)
-            if sq.left is not None:
-                left.append(sq.left)
-            if sq.right is not None:
-                right.append(sq.right)
+        quants = [sq.bottom for sq in column if sq.bottom is not None]
+        left = [sq.left for sq in column if sq.left is not None]
+        right = [sq.right for sq in column if sq.right is not None]
         if len(quants) > 0:
             self.scheduleWriter.doQuantify(quants)
         self.scheduleWriter.doComment("Completed column %d.  Quantified %d variables" % (c, len(quants)))
@@ -186,29 +164,44 @@ class Board:
 
     # Construct constraints for specified number of columns.  
     # Return lists of variables on left and right
+    # Splits columns recursively, but uses explicit stacks rather than recursion
     def treeBuild(self, leftIndex, columnCount):
-        if columnCount == 1:
-            (left, right) = self.doColumn(leftIndex)
-            self.scheduleWriter.doInformation("Generated column %d" % (leftIndex))
-            if leftIndex == 2:
-                self.scheduleWriter.doInformation("RCSIZE %d %d" % (self.n, columnCount))
-            return (left, right)
-        rightIndex = leftIndex + columnCount - 1
-        self.scheduleWriter.doComment("Generating columns %d .. %d" % (leftIndex, rightIndex))
-        lcount = columnCount // 2
-        rcount = columnCount - lcount
-        left, rightMid = self.treeBuild(leftIndex, lcount)
-        leftMid, right = self.treeBuild(leftIndex+lcount, rcount)
-        midLeftIndex = leftIndex + lcount - 1
-        midRightIndex = midLeftIndex + 1
-        self.scheduleWriter.doComment("Merge columns %d .. %d with %d .. %d" % (leftIndex, midLeftIndex, midRightIndex, rightIndex))
-        self.scheduleWriter.doAnd(1)
-        if len(rightMid) > 0:
-            self.scheduleWriter.doQuantify(rightMid)
-        self.scheduleWriter.doInformation("Merged columns %d .. %d with %d .. %d" % (leftIndex, midLeftIndex, midRightIndex, rightIndex))
-        if leftIndex <= self.n // 2 and rightIndex >= (self.n+1)//2 and rightIndex < self.n-1:
-                self.scheduleWriter.doInformation("RCSIZE %d %d" % (self.n, columnCount))
-        return (left, right)
+        # Pending tasks: (isMerge, leftIndex, columnCount).
+        tasks = [(False, leftIndex, columnCount)]
+        # Lists of variables on left and right for completed column ranges
+        results = []
+        while len(tasks) > 0:
+            isMerge, leftIndex, columnCount = tasks.pop()
+            rightIndex = leftIndex + columnCount - 1
+            if not isMerge:
+                if columnCount == 1:
+                    results.append(self.doColumn(leftIndex))
+                    self.scheduleWriter.doInformation("Generated column %d" % (leftIndex))
+                    if leftIndex == 2:
+                        self.scheduleWriter.doInformation("RCSIZE %d %d" % (self.n, columnCount))
+                    continue
+                self.scheduleWriter.doComment("Generating columns %d .. %d" % (leftIndex, rightIndex))
+                lcount = columnCount // 2
+                rcount = columnCount - lcount
+                # Generate left half, then right half, then merge them
+                tasks.append((True, leftIndex, columnCount))
+                tasks.append((False, leftIndex+lcount, rcount))
+                tasks.append((False, leftIndex, lcount))
+                continue
+            leftMid, right = results.pop()
+            left, rightMid = results.pop()
+            lcount = columnCount // 2
+            midLeftIndex = leftIndex + lcount - 1
+            midRightIndex = midLeftIndex + 1
+            self.scheduleWriter.doComment("Merge columns %d .. %d with %d .. %d" % (leftIndex, midLeftIndex, midRightIndex, rightIndex))
+            self.scheduleWriter.doAnd(1)
+            if len(rightMid) > 0:
+                self.scheduleWriter.doQuantify(rightMid)
+            self.scheduleWriter.doInformation("Merged columns %d .. %d with %d .. %d" % (leftIndex, midLeftIndex, midRightIndex, rightIndex))
+            if leftIndex <= self.n // 2 and rightIndex >= (self.n+1)//2 and rightIndex < self.n-1:
+                    self.scheduleWriter.doInformation("RCSIZE %d %d" % (self.n, columnCount))
+            results.append((left, right))
+        return results[0]
 
     def constructBoard(self):
         if self.doLinear:
@@ -218,35 +211,40 @@ class Board:
 
     def build(self):
         n = self.n
+        # Mark dividers to omit, indexed like hVar and vVar
+        omitH = [[False] * n for r in range(n+1)]
+        omitV = [[False] * (n+1) for r in range(n)]
+        if not self.includeCorners:
+            # Omit dividers for UL and LR corners
+            omitH[1][0] = omitH[n-1][n-1] = True
+            omitV[0][1] = omitV[n-1][n-1] = True
         # Generate variables
         for r in range(n):
             if r >= 1:
                 hlist = []
+                omitRow = omitH[r]
                 for c in range(n):
-                    # Horizontal divider above.  Omit ones for UL and LR corners
-                    omit = not self.includeCorners and (r==1 and c ==0)
-                    omit = omit or not self.includeCorners and (r==n-1 and c==n-1)
-                    if not omit:
+                    # Horizontal divider above
+                    if not omitRow[c]:
                         v = self.nextVariable()
-                        self.idDict[(r,c,True)] = v
+                        self.hVar[r][c] = v
                         hlist.append(v)
                 self.orderWriter.doOrder(hlist)
 
             vlist = []
+            omitRow = omitV[r]
             for c in range(1, n):
-                # Vertical divider to left.  Omit ones for UL and LR corners
-                omit = not self.includeCorners and (r==0 and c ==1)
-                omit = omit or not self.includeCorners and (r==n-1 and c==n-1)
-                if not omit:
+                # Vertical divider to left
+                if not omitRow[c]:
                     v = self.nextVariable()
-                    self.idDict[(r,c,False)] = v
+                    self.vVar[r][c] = v
                     vlist.append(v)
             self.orderWriter.doOrder(vlist)
 
         # Generate squares
         for r in range(n):
             for c in range(n):
-                self.squares[(r,c)] = Square(r, c, self.idDict)
+                self.squares[(r,c)] = Square(r, c, self.hVar, self.vVar)
 
         self.constructBoard()
 
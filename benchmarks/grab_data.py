@@ -23,6 +23,7 @@
 
 import sys
 import re
+import mmap
 
 # Generate tabbed data of numbers specified on target lines
 # Extracts problem size from file name
@@ -35,6 +36,12 @@ triggers = [
 
 headers = ["Problem"] + [header for (phrase, header) in triggers]
 
+# Match complete lines containing any trigger phrase
+triggerPattern = re.compile(b'(?m)^[^\n]*?(' +
+                            b'|'.join([re.escape(phrase.encode()) for (phrase, header) in triggers]) +
+                            b')[^\n]*')
+triggerDict = { phrase.encode() : header for (phrase, header) in triggers }
+
 def trim(s):
     while len(s) > 0 and s[-1] == '\n':
         s = s[:-1]
@@ -48,19 +55,15 @@ colonOrSpace = re.compile('[\s:]+')
 def lineSplit(s):
     return colonOrSpace.split(s)
 
+# Integer or decimal number, with optional sign and exponent
+number = re.compile(r'[-+]?(\d+(\.\d*)?|\.\d+)([eE][-+]?\d+)?')
+
 # Look for first field that can be parsed as number
 # Return field
 def firstNumberAsString(fields):
     for field in fields:
-        try:
-            val = float(field)
+        if number.fullmatch(field):
             return field
-        except:
-            try:
-                val = int(field)
-                return field
-            except:
-                continue
     return ""
 
 
@@ -73,18 +76,27 @@ def extract(fname):
         print("Couldn't extract problem size from file name '%s'" % fname)
         return None
     try:
-        f = open(fname, 'r')
+        f = open(fname, 'rb')
     except:
         print("Couldn't open file '%s'" % fname)
         return None
     strDict = { header : "" for header in headers }
     strDict["Problem"] = prob
-    for line in f:
-        line = trim(line)
-        for (phrase, header) in triggers:
-            if phrase in line:
-                fields = lineSplit(line)
-                strDict[header] = firstNumberAsString(fields)
+    try:
+        data = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+    except ValueError:
+        # Empty files cannot be mapped
+        data = b''
+    for m in triggerPattern.finditer(data):
+        lineBytes = m.group(0)
+        fields = lineSplit(lineBytes.decode(errors = 'replace'))
+        value = firstNumberAsString(fields)
+        # A line may contain more than one trigger phrase
+        for (phrase, header) in triggerDict.items():
+            if phrase in lineBytes:
+                strDict[header] = value
+    if len(data) > 0:
+        data.close()
     f.close()
     return strDict
 
@@ -92,17 +104,20 @@ def usage(name):
     print("Usage: %s file1 file2 ..." % name)
     sys.exit(0)
 
-def showList(ls):
-    print("\t".join(ls))
+# Print table with one tab-separated row per list, using a single write
+def showLists(lsList):
+    sys.stdout.write('\n'.join(["\t".join(ls) for ls in lsList]) + '\n')
 
 def run(name, args):
     if len(args) < 1:
         usage(name)
-    showList(headers)
+    rows = [headers]
     for fname in args:
         strDict = extract(fname)
-        strList = [strDict[header] for header in headers]
-        showList(strList)
+        if strDict is None:
+            continue
+        rows.append([strDict[header] for header in headers])
+    showLists(rows)
 
 if __name__ == "__main__":
     run(sys.argv[0], sys.argv[1:])
@@ -49,40 +49,32 @@ def usage(name):
 # will affect the status of hole h
 
 class Position:
-    h = 0
-    p = 0
-    M = None
-    Sprev = None
-    S = None
-    # idDict: Dictionary of variable identifiers, indexed by (h, p, ('S'|'M'))
-    def __init__(self, h, p, idDict):
+    # Configuration creates n*(n+1) positions.  Avoid per-instance dictionaries
+    __slots__ = ('h', 'p', 'M', 'Sprev', 'S')
+
+    # M, S: Lists of variable identifiers, indexed as [h][p].  None when not present
+    def __init__(self, h, p, M, S):
         self.h = h
         self.p = p
-        self.M, self.Sprev, self.S = [None] * 3
-        
-        if (h,p,'M') in idDict:
-            self.M = idDict[(h,p,'M')]
-        if (h,p,'S') in idDict:
-            self.S = idDict[(h,p,'S')]
-        if (h,p-1,'S') in idDict:
-            self.Sprev = idDict[(h,p-1,'S')]
+        self.M = M[h][p]
+        self.S = S[h][p]
+        self.Sprev = S[h][p-1] if p > 0 else None
 
     def doClauses(self, writer):
-        clist = []
+        clauses = []
         writer.doComment("AtMost1 constraint for hole %d, pigeon %d" % (self.h, self.p))
         if self.S is not None:
-            clist.append(writer.doClause([-self.M, self.S]))
+            clauses.append([-self.M, self.S])
         if self.Sprev is not None:
-            clist.append(writer.doClause([-self.Sprev, -self.M]))
+            clauses.append([-self.Sprev, -self.M])
             if self.S is not None:
-                clist.append(writer.doClause([-self.Sprev, self.S]))
-        return clist
+                clauses.append([-self.Sprev, self.S])
+        return writer.doClauses(clauses)
 
 class Configuration:
-    # Variable ids, indexed by (row, col, ('M'|'S'))
-    idDict = {}
-    # Positions indexed by (row, col)
-    positions = {}
+    # Variable ids for M and S, indexed by [row][col]
+    M = []
+    S = []
     variableCount = 0
     cnfWriter = None
     scheduleWriter = None
@@ -97,8 +89,8 @@ class Configuration:
         self.cnfWriter = writer.CnfWriter(variableCount, rootName, self.verbose)
         self.scheduleWriter = writer.ScheduleWriter(variableCount, rootName, self.verbose)
         self.orderWriter = writer.OrderWriter(variableCount, rootName, self.verbose)
-        self.idDict = {}
-        self.positions = {}
+        self.M = [[None] * (n+1) for h in range(n)]
+        self.S = [[None] * (n+1) for h in range(n)]
         self.variableCount = 0
 
     def nextVariable(self):
@@ -111,35 +103,30 @@ class Configuration:
             hlist = []
             for p in range(self.n+1):
                 mv = self.nextVariable()
-                self.idDict[(h, p, 'M')] = mv
+                self.M[h][p] = mv
                 hlist.append(mv)
                 if p < self.n:
                     sv = self.nextVariable()        
-                    self.idDict[(h, p, 'S')] = sv
+                    self.S[h][p] = sv
                     hlist.append(sv)
                     self.cnfWriter.doComment("Hole %d, pigeon %d: M=%d S=%d" % (h, p, mv, sv))
                 else:
                     self.cnfWriter.doComment("Hole %d, pigeon %d: M=%d" % (h, p, mv))
             self.orderWriter.doOrder(hlist)
 
-    def buildPositions(self):
-        for h in range(self.n):
-            for p in range(self.n+1):
-                self.positions[(h,p)] = Position(h,p, self.idDict)
-
     # Capture the effect pigeon p has on the holes
     # Return list of variables from previous pigeon
     def processPigeon(self, p):
         # The pigeon must be in some hole:
         self.cnfWriter.doComment("Pigeon %d must be in some hole" % p)
-        pvars = [self.idDict[(h, p, 'M')] for h in range(self.n)]
+        pvars = [self.M[h][p] for h in range(self.n)]
         cfirst = self.cnfWriter.doClause(pvars)
         self.scheduleWriter.getClauses([cfirst])
         # Compute new value of S for each hole
         plist = []
         quants = []
         for h in range(self.n):
-            position = self.positions[(h,p)]
+            position = Position(h, p, self.M, self.S)
             clist = position.doClauses(self.cnfWriter)
             self.scheduleWriter.getClauses(clist)
             self.scheduleWriter.doAnd(len(clist))
@@ -164,7 +151,6 @@ class Configuration:
 
     def build(self):
         self.generateVariables()
-        self.buildPositions()
         self.constructProblem()
 
     def finish(self):
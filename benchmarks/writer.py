@@ -1,4 +1,6 @@
 # Code for generating CNF, order, and schedule files
+import sys
+
 class WriterException(Exception):
 
     def __init__(self, value):
@@ -14,34 +16,38 @@ class Writer:
     suffix = None
     verbose = False
     expectedVariableCount = None
+    # Lines to be written by finish()
+    outputList = []
 
     def __init__(self, count, froot, suffix = None, verbose = False):
         self.expectedVariableCount = count
         self.verbose = verbose
+        self.outputList = []
+        if not verbose:
+            # Skip the verbosity test on every line
+            self.show = self.outputList.append
         if suffix is not None:
             self.suffix = suffix 
             fname = froot if self.suffix is None else froot + "." + self.suffix
         try:
-            self.outfile = open(fname, 'w')
+            self.outfile = open(fname, 'wb')
         except:
             print("Couldn't open file '%s'. Aborting" % fname)
             sys.exit(1)
 
-    def trim(self, line):
-        while len(line) > 0 and line[-1] == '\n':
-            line = line[:-1]
-        return line
-
+    # Lines should not contain newlines
     def show(self, line):
-        line = self.trim(line)
         if self.verbose:
             print(line)
-        if self.outfile is not None:
-            self.outfile.write(line + '\n')
+        self.outputList.append(line)
 
+    # Write all accumulated lines at once
     def finish(self):
         if self.outfile is None:
             return
+        if len(self.outputList) > 0:
+            self.outfile.write(('\n'.join(self.outputList) + '\n').encode('ascii'))
+        self.outputList = []
         self.outfile.close()
         self.outfile = None
 
@@ -49,12 +55,15 @@ class Writer:
 # Creating CNF
 class CnfWriter(Writer):
     clauseCount = 0
-    outputList = []
+    # Mapping from literals -count..count to their string representations,
+    # since each literal is formatted many times.
+    # Literals outside that range are formatted with str()
+    literalStrings = {}
 
     def __init__(self, count, froot, verbose = False):
         Writer.__init__(self, count, froot, suffix = "cnf", verbose = verbose)
         self.clauseCount = 0
-        self.ouputList = []
+        self.literalStrings = { i : str(i) for i in range(-count, count+1) }
 
     # With CNF, must accumulate all of the clauses, since the file header
     # requires providing the number of clauses.
@@ -64,18 +73,28 @@ class CnfWriter(Writer):
 
     def doClause(self, literals):
         ilist = literals + [0]
-        self.outputList.append(" ".join([str(i) for i in ilist]))
+        lstrings = self.literalStrings
+        self.outputList.append(" ".join([lstrings.get(i) or str(i) for i in ilist]))
         self.clauseCount += 1
         return self.clauseCount
 
+    # Add list of clauses.  Return list of their ids
+    def doClauses(self, clauses):
+        first = self.clauseCount + 1
+        lstrings = self.literalStrings
+        self.outputList.extend([" ".join([lstrings.get(i) or str(i) for i in literals + [0]]) for literals in clauses])
+        self.clauseCount += len(clauses)
+        return list(range(first, self.clauseCount + 1))
+
     def finish(self):
         if self.outfile is None:
             return
-        self.show("p cnf %d %d" % (self.expectedVariableCount, self.clauseCount))
-        for line in self.outputList:
-            self.show(line)
-        self.outfile.close()
-        self.outfile = None
+        header = "p cnf %d %d" % (self.expectedVariableCount, self.clauseCount)
+        if self.verbose:
+            print(header)
+            print('\n'.join(self.outputList))
+        self.outfile.write((header + '\n').encode('ascii'))
+        Writer.finish(self)
      
     
 class ScheduleWriter(Writer):
@@ -122,7 +141,7 @@ class ScheduleWriter(Writer):
         if self.stackDepth == 0:
             print ("Warning: Cannot quantify.  Stack empty")
 #            raise WriterException("Cannot quantify.  Stack empty")
-        self.show("q %s" % " ".join([str(c) for c in vlist]))
+        self.show("q %s" % " ".join([str(v) for v in vlist]))
 
     def doComment(self, cstring):
         self.show("# " + cstring)
@@ -137,26 +156,42 @@ class ScheduleWriter(Writer):
         Writer.finish(self)
 
 class OrderWriter(Writer):
-    variableList = []
+    variableCount = 0
+    # Flag for each variable indicating whether it has been ordered
+    seen = None
+    # Were any variables beyond the expected count ordered?
+    extraVariables = False
 
     def __init__(self, count, froot, verbose = False):
         Writer.__init__(self, count, froot, suffix = "order", verbose = verbose)
-        self.variableList = []
+        self.variableCount = 0
+        self.seen = bytearray(count+1)
+        # No variable 0
+        self.seen[0] = 1
+        self.extraVariables = False
 
     def doOrder(self, vlist):
-        self.show(" ".join([str(c) for c in vlist]))        
-        self.variableList += vlist
+        for v in vlist:
+            if v < 1:
+                raise WriterException("Mismatch in ordering.  Variable %d out of range" % v)
+            if v > self.expectedVariableCount:
+                # Only an error if some expected variable is missing
+                self.extraVariables = True
+                continue
+            if self.seen[v]:
+                raise WriterException("Mismatch in ordering.  Variable %d occurs multiple times" % v)
+            self.seen[v] = 1
+        self.variableCount += len(vlist)
+        self.show(" ".join([str(v) for v in vlist]))
 
     def finish(self):
-        if self.expectedVariableCount != len(self.variableList):
+        if self.expectedVariableCount != self.variableCount:
 #            raise WriterException("Incorrect number of variables in ordering %d != %d" % (
-#                len(self.variableList), self.expectedVariableCount))
+#                self.variableCount, self.expectedVariableCount))
             print("Warning: Incorrect number of variables in ordering")
-            print("  Expected %d.  Got %d" % (self.expectedVariableCount, len(self.variableList)))
-
-        expected = range(1, self.expectedVariableCount+1)
-        self.variableList.sort()
-        for (e, a) in zip(expected, self.variableList):
-            if e != a:
-               raise WriterException("Mismatch in ordering.  Expected %d.  Got %d" % (e, a))
+            print("  Expected %d.  Got %d" % (self.expectedVariableCount, self.variableCount))
+        missing = self.seen.find(0)
+        # Ordering may stop short of the final variables, but must not skip any before that
+        if missing >= 0 and (self.extraVariables or self.seen.find(1, missing) >= 0):
+            raise WriterException("Mismatch in ordering.  Variable %d missing" % missing)
         Writer.finish(self)
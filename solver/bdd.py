@@ -23,10 +23,31 @@
 # Implementation of simple BDD package
 
 from functools import total_ordering
+from collections import deque, OrderedDict
 
 import sys
 import resolver
 
+# Operation codes for operation cache keys
+# Key packs two node ids and an opcode into a single integer (see operationKey):
+#   ((idA << 32) | idB) << opBits | opcode
+# Unary operations use the node id for both operands
+opAnd = 1
+opAndNoJustify = 2
+opNot = 3
+opOr = 4
+opXor = 5
+opImply = 6
+opEquant = 7
+opBits = 3
+opMask = (1 << opBits) - 1
+idBits = 32
+idMask = (1 << idBits) - 1
+
+# Node ids must fit in idBits for packed keys to be unambiguous.  See findOrMake
+def operationKey(opcode, idA, idB):
+    return (((idA << idBits) | (idB & idMask)) << opBits) | opcode
+
 class BddException(Exception):
 
     def __init__(self, value):
@@ -66,10 +87,11 @@ class DummyProver:
 
 @total_ordering
 class Variable:
-    name = None
-    level = 0  # For ordering
+    # name
+    # level: For ordering
+    # id: Serves as identity of resolution variable
+    __slots__ = ('name', 'level', 'id')
     leafLevel = -1 # Special value
-    id = None # Serves as identity of resolution variable
 
     def __init__(self, level, name = None, id = None):
         self.level = level
@@ -103,20 +125,22 @@ class Variable:
     def __str__(self):
         return self.name
 
+# Variable shared by all leaf nodes
+leafVariable = Variable(Variable.leafLevel, "Leaf")
+
 
+# Nodes are unique within a manager, and so equality and hashing
+# use the default identity-based versions
 class Node:
-    id = 0 # Also serves as identity of ER variable
-    variable = None
+    # id: Also serves as identity of ER variable
+    # variable
+    # gcMark: Number of most recent GC that found node to be accessible
+    __slots__ = ('id', 'variable', 'gcMark')
 
     def __init__(self, id, variable):
         self.id = id
         self.variable = variable
-    
-    def __eq__(self, other):
-        return self.id == other.id
-
-    def __hash__(self):
-        return self.id
+        self.gcMark = 0
 
     def label(self):
         return "N%d" % self.id
@@ -129,12 +153,13 @@ class Node:
 
 
 class LeafNode(Node):
-    value = None # 0 or 1
-    inferValue = None # Number of unit clause asserting its value
+    # value: 0 or 1
+    # inferValue: Number of unit clause asserting its value
+    __slots__ = ('value', 'inferValue')
 
     def __init__(self, value):
         id = resolver.tautologyId if value == 1 else -resolver.tautologyId        
-        Node.__init__(self, id, Variable(Variable.leafLevel, "Leaf"))
+        Node.__init__(self, id, leafVariable)
         self.value = value
         self.inferValue = self.id
 
@@ -155,18 +180,18 @@ class LeafNode(Node):
 
 
 class VariableNode(Node):
-    high = None
-    low = None
-    # Identity of clauses generated from node
-    inferTrueUp = None
-    inferFalseUp = None
-    inferTrueDown = None
-    inferTrueDown = None
+    # high, low
+    # inferTrueUp, inferFalseUp, inferTrueDown, inferFalseDown:
+    #   Identity of clauses generated from node
+    # isPositiveLit: Is high child leaf 1?  For literal and clause nodes,
+    #   this means that the node's variable occurs positively
+    __slots__ = ('high', 'low', 'inferTrueUp', 'inferFalseUp', 'inferTrueDown', 'inferFalseDown', 'isPositiveLit')
     
     def __init__(self, id, variable, high, low, prover):
         Node.__init__(self, id, variable)
         self.high = high
         self.low = low
+        self.isPositiveLit = high.isOne()
         vid = self.variable.id
         hid = self.high.id
         lid = self.low.id
@@ -185,27 +210,20 @@ class VariableNode(Node):
     def isLeaf(self):
         return False
 
+    # Nonleaf nodes compare levels directly, rather than via Variable ordering
     def branchHigh(self, variable):
-        if self.variable < variable:
+        level = self.variable.level
+        if level < variable.level:
             raise BddException("Node at level %d cannot branch on variable at level %d" % 
-                               (self.variable.level, variable.level))
-        if self.isLeaf():
-            return self
-        elif self.variable == variable:
-            return self.high
-        else:
-            return self
+                               (level, variable.level))
+        return self.high if level == variable.level else self
 
     def branchLow(self, variable):
-        if self.variable < variable:
+        level = self.variable.level
+        if level < variable.level:
             raise BddException("Node at level %d cannot branch on variable at level %d" % 
-                               (self.variable.level, variable.level))
-        if self.isLeaf():
-            return self
-        elif self.variable == variable:
-            return self.low
-        else:
-            return self
+                               (level, variable.level))
+        return self.low if level == variable.level else self
         
     def __str__(self):
         return "%d:%s->%s,%s" % (self.id, str(self.variable), self.high.label(), self.low.label())
@@ -220,10 +238,20 @@ class Manager:
     leaf0 = None
     leaf1 = None
     # Mapping from (variable, high, low) to node
+    # Key packs level and (possibly negative) child ids into single integer
     uniqueTable = {}
-    # Operation cache
-    # Key = (opName, operand1 ...) to (node, justification, clauseList)
+    # Operation cache for operations that generate proofs
+    # Key = packed (opcode, operand1, operand2) to (node, justification, clauseList)
     operationCache = {}
+    # Cache for operations that don't generate proofs
+    # Key = packed (opcode, operand1, operand2) to node
+    # Bounded in size, with least recently used entries evicted
+    simpleCache = None
+    simpleCacheLimit = 1 << 22
+    # Mapping from node id to support clause
+    supportCache = {}
+    # Mapping from (node id, support clause id) to solution count
+    countCache = {}
     verbLevel = 1
     andResolver = None
     implyResolver = None
@@ -234,8 +262,10 @@ class Manager:
     lastGC = 0
     # How many variables should be quantified to trigger GC?
     gcThreshold = 10
-    # Dictionary mapping variables to their IDs
-    quantifiedVariableSet = None
+    # Flags indicating which variables (by level) have been quantified
+    quantifiedLevels = None
+    # Number of distinct variables quantified
+    quantifiedCount = 0
     # Statistics
     cacheJustifyAdded = 0
     cacheNoJustifyAdded = 0
@@ -246,6 +276,8 @@ class Manager:
     cacheRemoved = 0
     nodesRemoved = 0
     gcCount = 0
+    # Stamp used to mark accessible nodes during GC
+    gcVersion = 0
 
     def __init__(self, prover = None, rootGenerator = None, nextNodeId = 0, verbLevel = 1):
 
@@ -259,9 +291,14 @@ class Manager:
         self.nextNodeId = nextNodeId
         self.uniqueTable = {}
         self.operationCache = {}
+        self.simpleCache = OrderedDict()
+        self.supportCache = {}
+        self.countCache = {}
         self.andResolver = resolver.AndResolver(prover)
         self.implyResolver = resolver.ImplyResolver(prover)
-        self.quantifiedVariableSet = set([])
+        # Index 0 is unused, since levels start at 1
+        self.quantifiedLevels = bytearray(1)
+        self.quantifiedCount = 0
         self.lastGC = 0
         self.cacheJustifyAdded = 0
         self.cacheNoJustifyAdded = 0
@@ -272,24 +309,31 @@ class Manager:
         self.cacheRemoved = 0
         self.nodesRemoved = 0
         self.gcCount = 0
+        self.gcVersion = 0
 
     def newVariable(self, name, id = None):
         level = len(self.variables) + 1
         var = Variable(level, name, id)
         self.variables.append(var)
+        self.quantifiedLevels.append(0)
         self.variableCount += 1
         return var
         
     def findOrMake(self, variable, high, low):
-        key = (variable.level, high.id, low.id)
-        if key in self.uniqueTable:
-            return self.uniqueTable[key]
+        key = (((variable.level << idBits) | (high.id & idMask)) << idBits) | (low.id & idMask)
+        table = self.uniqueTable
+        node = table.get(key)
+        if node is not None:
+            return node
         else:
+            if self.nextNodeId > idMask:
+                raise BddException("Node id %d does not fit in %d bits" % (self.nextNodeId, idBits))
             node = VariableNode(self.nextNodeId, variable, high, low, self.prover)
             self.nextNodeId += 1
-            self.uniqueTable[key] = node
+            table[key] = node
             self.nodeCount += 1
-            self.maxLiveCount = max(self.maxLiveCount, len(self.uniqueTable))
+            if len(table) > self.maxLiveCount:
+                self.maxLiveCount = len(table)
             return node
   
     def literal(self, variable, phase):
@@ -300,22 +344,41 @@ class Manager:
 
     def buildClause(self, literalList):
         lits = sorted(literalList, key=lambda n: -n.variable.level)
-        return self.reduceList(lits, self.applyOr, self.leaf0)
+        for lit in lits:
+            if lit.isLeaf() or not lit.high.isLeaf() or not lit.low.isLeaf():
+                return self.reduceList(lits, self.applyOr, self.leaf0)
+        # All literals.  Chain them together directly, working upward from the
+        # highest level.  This yields the same nodes as the Or reduction
+        leaf1 = self.leaf1
+        clause = self.leaf0
+        for lit in lits:
+            if clause is self.leaf0:
+                clause = lit
+            elif clause.variable.level == lit.variable.level:
+                # Repeated variable.  Opposite phases make clause a tautology
+                if clause.isPositiveLit != lit.isPositiveLit:
+                    return leaf1
+            elif lit.isPositiveLit:
+                clause = self.findOrMake(lit.variable, leaf1, clause)
+            else:
+                clause = self.findOrMake(lit.variable, clause, leaf1)
+        return clause
 
     def constructClause(self, clauseId, literalList):
         root = self.buildClause(literalList)
         lits = self.deconstructClause(root)
         # List antecedents in reverse order of resolution steps
         antecedents = []
+        leaf0 = self.leaf0
         for node in lits:
-            positive = node.high == self.leaf1
+            positive = node.isPositiveLit
             if positive:
                 antecedents.append(node.inferTrueUp)
-                if node.low != self.leaf0:
+                if node.low is not leaf0:
                     antecedents.append(node.inferFalseUp)
             else:
                 antecedents.append(node.inferFalseUp)
-                if node.high != self.leaf0:
+                if node.high is not leaf0:
                     antecedents.append(node.inferTrueUp)
         antecedents.append(clauseId)
         validation = self.prover.createClause([root.id], antecedents, "Validate BDD representation of clause %d" % clauseId)
@@ -324,7 +387,7 @@ class Manager:
     def deconstructClause(self, clause):
         lits = []
         while not clause.isLeaf():
-            positive = clause.high == self.leaf1
+            positive = clause.isPositiveLit
             lits.append(clause)
             clause = clause.low if positive else clause.high
         return lits
@@ -332,32 +395,39 @@ class Manager:
     # Build dictionary mapping nodes in DAG rooted by node to values
     # nodeFunction should be a function mapping a node to a value
     def buildInformation(self, node, nodeFunction, sofarDict):
-        if node in sofarDict:
-            return sofarDict
-        sofarDict[node] = nodeFunction(node)
-        if node.isLeaf():
-            return sofarDict
-        else:
-            sofarDict = self.buildInformation(node.high, nodeFunction, sofarDict)
-            return self.buildInformation(node.low, nodeFunction, sofarDict)
+        stack = [node]
+        while len(stack) > 0:
+            node = stack.pop()
+            if node in sofarDict:
+                continue
+            sofarDict[node] = nodeFunction(node)
+            if not node.isLeaf():
+                stack.append(node.low)
+                stack.append(node.high)
+        return sofarDict
         
     # Find support for function rooted by node.  Return as clause
+    # Results are cached until the next GC
     def getSupport(self, node):
+        if node.id in self.supportCache:
+            return self.supportCache[node.id]
         varDict = self.buildInformation(node, lambda n: n.variable, {})
         fullList = sorted(varDict.values())
         vlist = []
         for v in fullList:
-            if (len(vlist) == 0 or vlist[-1] != v) and v.level != Variable.leafLevel:
+            if (len(vlist) == 0 or vlist[-1] != v) and v is not leafVariable:
                 vlist.append(v)
         lits = [self.literal(v, 1) for v in  vlist]
-        return self.buildClause(lits)
+        support = self.buildClause(lits)
+        self.supportCache[node.id] = support
+        return support
 
     def getSize(self, node):
         oneDict = self.buildInformation(node, lambda n: 1, {})
         return len(oneDict)
 
     def showLiteral(self, lit):
-        positive = lit.high == self.leaf1
+        positive = lit.isPositiveLit
         prefix = ' ' if positive else '!'
         return prefix + str(lit.variable)
 
@@ -369,62 +439,93 @@ class Manager:
 
     # Count number of solutions to function
     # Over variables consisting of support set for function
+    # Partial counts are retained until the next GC
     def satisfyCount(self, root):
         supportClause = self.getSupport(root)
-        # Mapping from (node, support) to count
-        countDict = {(self.leaf1, self.leaf0) : 1}
-        count = self.countStep(root, supportClause, countDict)
+        count = self.countStep(root, supportClause, self.countCache)
         return count
 
-    # Recursive step of solution counting
+    # Solution counting by dynamic programming, working upward from the leaves
+    # Each node's count is over the support variables at or below its level
+    # countDict maps (node id, support id) to count
     def countStep(self, root, supportClause, countDict):
-        if (root, supportClause) in countDict:
-            return countDict[(root, supportClause)]
-        if root == self.leaf0:
-            countDict[(root, supportClause)] = 0
-            return 0
-        if supportClause == self.leaf0:
-            msg = "Ran out of support variables with nonleaf root node %s" % (str(root))
+        # Position of each support variable in the support clause, by level
+        position = {}
+        nextc = supportClause
+        while not nextc.isLeaf():
+            position[nextc.variable.level] = len(position)
+            nextc = nextc.low
+        size = len(position)
+        sid = supportClause.id
+        if root.isLeaf():
+            return root.value << size
+        if root.variable.level not in position:
+            msg = "Node variable not in support set for node %s" % (str(root))
             raise BddException(msg)
-        varS = supportClause.variable
-        varR = root.variable
-        nsupport = supportClause.low
-        if varS < varR:
-            ncount = self.countStep(root, nsupport, countDict)
-            count = 2 * ncount
-        elif varS == varR:
-            highR = root.high
-            lowR =  root.low
-            countH = self.countStep(highR, nsupport, countDict)
-            countL = self.countStep(lowR, nsupport, countDict)
-            count = countH + countL
-        else:
-            msg = "Node variable not in support set" % (str(root))
-            raise BddException(msg)
-        countDict[(root, supportClause)] = count
-        return count
+        rootPos = position[root.variable.level]
+        # Previously counted roots need no traversal
+        count = countDict.get((root.id, sid))
+        if count is not None:
+            return count << rootPos
+        counts = {self.leaf0.id : 0, self.leaf1.id : 1}
+        # Collect uncounted nodes, stopping at leaves and at nodes with cached counts
+        nodes = []
+        visited = set([])
+        stack = [root]
+        while len(stack) > 0:
+            node = stack.pop()
+            if node.id in counts or node.id in visited:
+                continue
+            count = countDict.get((node.id, sid))
+            if count is not None:
+                counts[node.id] = count
+                continue
+            visited.add(node.id)
+            nodes.append(node)
+            stack.append(node.low)
+            stack.append(node.high)
+        # Children have higher levels than their parents
+        nodes.sort(key = lambda n: -n.variable.level)
+        for node in nodes:
+            key = (node.id, sid)
+            if node.variable.level not in position:
+                msg = "Node variable not in support set for node %s" % (str(node))
+                raise BddException(msg)
+            pos = position[node.variable.level]
+            # Support variables skipped along an edge double the count
+            high = node.high
+            low = node.low
+            highPos = size if high.isLeaf() else position[high.variable.level]
+            lowPos = size if low.isLeaf() else position[low.variable.level]
+            count = (counts[high.id] << (highPos - pos - 1)) + (counts[low.id] << (lowPos - pos - 1))
+            countDict[key] = count
+            counts[node.id] = count
+        return counts[root.id] << rootPos
+
+    # Generate paths to leaf1, each as a list of (variable, phase) pairs
+    # The same list is reused for every path, so consumers should copy it
+    def satisfyPaths(self, node, path):
+        if node.isLeaf():
+            if node.value == 1:
+                yield path
+            return
+        path.append((node.variable, 1))
+        yield from self.satisfyPaths(node.high, path)
+        path[-1] = (node.variable, 0)
+        yield from self.satisfyPaths(node.low, path)
+        path.pop()
 
     # Return lists of literals representing all solutions
     def satisfy(self, node):
-        if node.isLeaf():
-            return [] if node.value == 0 else [[]]
-        highList = self.satisfy(node.high)
-        highPrefix = [self.literal(node.variable, 1)]
-        highList = [highPrefix + ls for ls in highList]
-        lowList = self.satisfy(node.low)
-        lowPrefix = [self.literal(node.variable, 0)]
-        lowList = [lowPrefix + ls for ls in lowList]        
-        return  highList + lowList
+        return [[self.literal(var, phase) for (var, phase) in path] for path in self.satisfyPaths(node, [])]
 
     # Generate strings representing all possible solutions
     def satisfyStrings(self, node, limit = None):
-        satList = self.satisfy(node)
         stringList = []
-        for litList in satList:
+        for path in self.satisfyPaths(node, []):
             slist = ['-'] * len(self.variables)
-            for lit in litList:
-                positive = lit.high == self.leaf1
-                slist[lit.variable.level-1] = '1' if positive else '0'
+            for (var, phase) in path:
+                slist[var.level-1] = '1' if phase == 1 else '0'
             stringList.append(''.join(slist))
             if limit is not None and len(stringList) >= limit:
                 break
@@ -434,27 +535,33 @@ class Manager:
     # Justification is None if it would be tautology
     def applyAndJustify(self, nodeA, nodeB):
         self.applyCount += 1
+        leaf0 = self.leaf0
+        leaf1 = self.leaf1
+        tautologyId = resolver.tautologyId
         # Constant cases.
         # No justifications required, since all return one of the arguments
-        if nodeA == self.leaf0 or nodeB == self.leaf0:
-            return (self.leaf0, resolver.tautologyId)
-        if nodeA == self.leaf1:
-            return (nodeB, resolver.tautologyId)
-        if nodeB == self.leaf1:
-            return (nodeA, resolver.tautologyId)
+        if nodeA == leaf0 or nodeB == leaf0:
+            return (leaf0, tautologyId)
+        if nodeA == leaf1:
+            return (nodeB, tautologyId)
+        if nodeB == leaf1:
+            return (nodeA, tautologyId)
         if nodeA == nodeB:
-            return (nodeA, resolver.tautologyId)
+            return (nodeA, tautologyId)
 
         if nodeA.id > nodeB.id:
             nodeA, nodeB = nodeB, nodeA
-        key = ("and", nodeA.id, nodeB.id)
-        if key in self.operationCache:
-            return self.operationCache[key][:2]
+        key = operationKey(opAnd, nodeA.id, nodeB.id)
+        cache = self.operationCache
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[:2]
 
         # Mapping from rule names to clause numbers
         ruleIndex = {}
         # Mapping from variable names to variable numbers
-        splitVar = min(nodeA.variable, nodeB.variable)
+        # Neither node is a leaf, so split on the lower level
+        splitVar = nodeA.variable if nodeA.variable.level <= nodeB.variable.level else nodeB.variable
         highA = nodeA.branchHigh(splitVar)
         lowA =  nodeA.branchLow(splitVar)
         highB = nodeB.branchHigh(splitVar) 
@@ -481,134 +588,228 @@ class Manager:
             ruleIndex["WLU"] = newNode.inferFalseUp
 
         targetClause = resolver.cleanClause([-nodeA.id, -nodeB.id, newNode.id])
-        if targetClause == resolver.tautologyId:
-            justification, clauseList = resolver.tautologyId, []
+        if targetClause == tautologyId:
+            justification, clauseList = tautologyId, []
         else:
             comment = "Justification that %s & %s ==> %s" % (nodeA.label(), nodeB.label(), newNode.label())
             justification, clauseList = self.andResolver.run(targetClause, ruleIndex, comment)
-        self.operationCache[key] = (newNode, justification,clauseList)
+        cache[key] = (newNode, justification,clauseList)
         self.cacheJustifyAdded += 1
         return (newNode, justification)
 
+    # Add entry to cache of results not requiring proofs
+    def addSimple(self, key, node):
+        self.simpleCache[key] = node
+        if len(self.simpleCache) > self.simpleCacheLimit:
+            self.simpleCache.popitem(last = False)
+            self.cacheRemoved += 1
+
     # Version that runs without generating justification
+    # Iterative, with explicit stacks.  Task stack entries are either
+    # (False, nodeA, nodeB), requesting evaluation of the operation,
+    # or (True, key, splitVar), combining the top two results
     def applyAnd(self, nodeA, nodeB):
-        self.applyCount += 1
-        # Constant cases.
-        if nodeA == self.leaf0 or nodeB == self.leaf0:
-            return self.leaf0
-        if nodeA == self.leaf1:
-            return nodeB
-        if nodeB == self.leaf1:
-            return nodeA
-        if nodeA == nodeB:
-            return nodeA
-
-        if nodeA.id > nodeB.id:
-            nodeA, nodeB = nodeB, nodeA
-        key = ("andnj", nodeA.id, nodeB.id)
-        if key in self.operationCache:
-            return self.operationCache[key]
-
-        # Mapping from variable names to variable numbers
-        splitVar = min(nodeA.variable, nodeB.variable)
-        highA = nodeA.branchHigh(splitVar)
-        lowA =  nodeA.branchLow(splitVar)
-        highB = nodeB.branchHigh(splitVar) 
-        lowB =  nodeB.branchLow(splitVar)
+        tasks = [(False, nodeA, nodeB)]
+        results = []
+        # Bind frequently used attributes to locals
+        leaf0 = self.leaf0
+        leaf1 = self.leaf1
+        cache = self.simpleCache
+        count = 0
+        while len(tasks) > 0:
+            combine, nodeA, nodeB = tasks.pop()
+            if combine:
+                key, splitVar = nodeA, nodeB
+                newLow = results.pop()
+                newHigh = results.pop()
+                if newHigh == newLow:
+                    newNode = newHigh
+                else:
+                    newNode = self.findOrMake(splitVar, newHigh, newLow)
+                self.addSimple(key, newNode)
+                results.append(newNode)
+                continue
+            count += 1
+            # Constant cases.
+            if nodeA == leaf0 or nodeB == leaf0:
+                results.append(leaf0)
+                continue
+            if nodeA == leaf1:
+                results.append(nodeB)
+                continue
+            if nodeB == leaf1 or nodeA == nodeB:
+                results.append(nodeA)
+                continue
 
-        newHigh = self.applyAnd(highA, highB)
-        newLow  = self.applyAnd(lowA, lowB)
+            if nodeA.id > nodeB.id:
+                nodeA, nodeB = nodeB, nodeA
+            key = operationKey(opAndNoJustify, nodeA.id, nodeB.id)
+            result = cache.get(key)
+            if result is not None:
+                cache.move_to_end(key)
+                results.append(result)
+                continue
 
-        if newHigh == newLow:
-            newNode = newHigh
-        else:
-            newNode = self.findOrMake(splitVar, newHigh, newLow)
+            # Mapping from variable names to variable numbers
+            splitVar = nodeA.variable if nodeA.variable.level <= nodeB.variable.level else nodeB.variable
+            highA = nodeA.branchHigh(splitVar)
+            lowA =  nodeA.branchLow(splitVar)
+            highB = nodeB.branchHigh(splitVar) 
+            lowB =  nodeB.branchLow(splitVar)
 
-        self.operationCache[key] = newNode
-        return newNode
+            # Evaluate high, then low, then combine
+            tasks.append((True, key, splitVar))
+            tasks.append((False, lowA, lowB))
+            tasks.append((False, highA, highB))
+        self.applyCount += count
+        return results[0]
 
     def applyNot(self, node):
-        # Constant case
-        if node == self.leaf1:
-            return self.leaf0
-        if node == self.leaf0:
-            return self.leaf1
-        key = ("not", node.id)
-        if key in self.operationCache:
-            return self.operationCache[key][0]
-        var = node.variable
-        high = node.high
-        low = node.low
-        newHigh = self.applyNot(high)
-        newLow = self.applyNot(low)
-        newNode = self.findOrMake(var, newHigh, newLow)
-        self.operationCache[key] = (newNode, resolver.tautologyId,[])
-        self.cacheNoJustifyAdded += 1
-        return newNode
+        # Task stack entries are (combine, node)
+        tasks = [(False, node)]
+        results = []
+        leaf0 = self.leaf0
+        leaf1 = self.leaf1
+        cache = self.simpleCache
+        added = 0
+        while len(tasks) > 0:
+            combine, node = tasks.pop()
+            if combine:
+                newLow = results.pop()
+                newHigh = results.pop()
+                newNode = self.findOrMake(node.variable, newHigh, newLow)
+                self.addSimple(operationKey(opNot, node.id, node.id), newNode)
+                # Negation is its own inverse, so record the reverse result as well
+                self.addSimple(operationKey(opNot, newNode.id, newNode.id), node)
+                added += 2
+                results.append(newNode)
+                continue
+            # Constant case
+            if node == leaf1:
+                results.append(leaf0)
+                continue
+            if node == leaf0:
+                results.append(leaf1)
+                continue
+            key = operationKey(opNot, node.id, node.id)
+            result = cache.get(key)
+            if result is not None:
+                cache.move_to_end(key)
+                results.append(result)
+                continue
+            tasks.append((True, node))
+            tasks.append((False, node.low))
+            tasks.append((False, node.high))
+        self.cacheNoJustifyAdded += added
+        return results[0]
 
     def applyOr(self, nodeA, nodeB):
-        # Constant cases
-        if nodeA == self.leaf1:
-            return self.leaf1
-        if nodeB == self.leaf1:
-            return self.leaf1
-        if nodeA == self.leaf0:
-            return nodeB
-        if nodeB == self.leaf0:
-            return nodeA
-        if nodeA == nodeB:
-            return nodeA
-        if nodeA.id > nodeB.id:
-            nodeA, nodeB = nodeB, nodeA
+        # Same task structure as applyAnd
+        tasks = [(False, nodeA, nodeB)]
+        results = []
+        leaf0 = self.leaf0
+        leaf1 = self.leaf1
+        cache = self.simpleCache
+        added = 0
+        while len(tasks) > 0:
+            combine, nodeA, nodeB = tasks.pop()
+            if combine:
+                key, splitVar = nodeA, nodeB
+                newLow = results.pop()
+                newHigh = results.pop()
+                newNode = newHigh if newHigh == newLow else self.findOrMake(splitVar, newHigh, newLow)
+                self.addSimple(key, newNode)
+                added += 1
+                results.append(newNode)
+                continue
+            # Constant cases
+            if nodeA == leaf1 or nodeB == leaf1:
+                results.append(leaf1)
+                continue
+            if nodeA == leaf0:
+                results.append(nodeB)
+                continue
+            if nodeB == leaf0 or nodeA == nodeB:
+                results.append(nodeA)
+                continue
+            if nodeA.id > nodeB.id:
+                nodeA, nodeB = nodeB, nodeA
+
+            key = operationKey(opOr, nodeA.id, nodeB.id)
+            result = cache.get(key)
+            if result is not None:
+                cache.move_to_end(key)
+                results.append(result)
+                continue
 
-        key = ("or", nodeA.id, nodeB.id)
-        if key in self.operationCache:
-            return self.operationCache[key][0]
+            splitVar = nodeA.variable if nodeA.variable.level <= nodeB.variable.level else nodeB.variable
+            highA = nodeA.branchHigh(splitVar)
+            lowA =  nodeA.branchLow(splitVar)
+            highB = nodeB.branchHigh(splitVar) 
+            lowB =  nodeB.branchLow(splitVar)
 
-        splitVar = min(nodeA.variable, nodeB.variable)  
-        highA = nodeA.branchHigh(splitVar)
-        lowA =  nodeA.branchLow(splitVar)
-        highB = nodeB.branchHigh(splitVar) 
-        lowB =  nodeB.branchLow(splitVar)
-
-        newHigh = self.applyOr(highA, highB)
-        newLow = self.applyOr(lowA, lowB)
-        newNode = newHigh if newHigh == newLow else self.findOrMake(splitVar, newHigh, newLow)
-        self.operationCache[key] = (newNode, resolver.tautologyId,[])
-        self.cacheNoJustifyAdded += 1
-        return newNode
+            tasks.append((True, key, splitVar))
+            tasks.append((False, lowA, lowB))
+            tasks.append((False, highA, highB))
+        self.cacheNoJustifyAdded += added
+        return results[0]
 
     def applyXor(self, nodeA, nodeB):
-        # Constant cases
-        if nodeA == self.leaf1:
-            return self.applyNot(nodeB)
-        if nodeB == self.leaf1:
-            return self.applyNot(nodeA)
-        if nodeA == self.leaf0:
-            return nodeB
-        if nodeB == self.leaf0:
-            return nodeA
-        if nodeA == nodeB:
-            return self.leaf0
-        if nodeA.id > nodeB.id:
-            nodeA, nodeB = nodeB, nodeA
-
-        key = ("xor", nodeA.id, nodeB.id)
-        if key in self.operationCache:
-            return self.operationCache[key][0]
-
-        splitVar = min(nodeA.variable, nodeB.variable)  
-        highA = nodeA.branchHigh(splitVar)
-        lowA =  nodeA.branchLow(splitVar)
-        highB = nodeB.branchHigh(splitVar) 
-        lowB =  nodeB.branchLow(splitVar)
+        # Same task structure as applyAnd
+        tasks = [(False, nodeA, nodeB)]
+        results = []
+        leaf0 = self.leaf0
+        leaf1 = self.leaf1
+        cache = self.simpleCache
+        added = 0
+        while len(tasks) > 0:
+            combine, nodeA, nodeB = tasks.pop()
+            if combine:
+                key, splitVar = nodeA, nodeB
+                newLow = results.pop()
+                newHigh = results.pop()
+                newNode = newHigh if newHigh == newLow else self.findOrMake(splitVar, newHigh, newLow)
+                self.addSimple(key, newNode)
+                added += 1
+                results.append(newNode)
+                continue
+            # Constant cases
+            if nodeA == leaf1:
+                results.append(self.applyNot(nodeB))
+                continue
+            if nodeB == leaf1:
+                results.append(self.applyNot(nodeA))
+                continue
+            if nodeA == leaf0:
+                results.append(nodeB)
+                continue
+            if nodeB == leaf0:
+                results.append(nodeA)
+                continue
+            if nodeA == nodeB:
+                results.append(leaf0)
+                continue
+            if nodeA.id > nodeB.id:
+                nodeA, nodeB = nodeB, nodeA
+
+            key = operationKey(opXor, nodeA.id, nodeB.id)
+            result = cache.get(key)
+            if result is not None:
+                cache.move_to_end(key)
+                results.append(result)
+                continue
 
-        newHigh = self.applyXor(highA, highB)
-        newLow = self.applyXor(lowA, lowB)
-        newNode = newHigh if newHigh == newLow else self.findOrMake(splitVar, newHigh, newLow)
-        self.operationCache[key] = (newNode, resolver.tautologyId,[])
-        self.cacheNoJustifyAdded += 1
-        return newNode
+            splitVar = nodeA.variable if nodeA.variable.level <= nodeB.variable.level else nodeB.variable
+            highA = nodeA.branchHigh(splitVar)
+            lowA =  nodeA.branchLow(splitVar)
+            highB = nodeB.branchHigh(splitVar) 
+            lowB =  nodeB.branchLow(splitVar)
+
+            tasks.append((True, key, splitVar))
+            tasks.append((False, lowA, lowB))
+            tasks.append((False, highA, highB))
+        self.cacheNoJustifyAdded += added
+        return results[0]
     
     def justifyImply(self, nodeA, nodeB):
         self.applyCount += 1
@@ -626,12 +827,13 @@ class Manager:
         if nodeB == self.leaf0:
             return (False, resolver.tautologyId)
 
-        key = ("imply", nodeA.id, nodeB.id)
-        if key in self.operationCache:
-            return self.operationCache[key][:2]
+        key = operationKey(opImply, nodeA.id, nodeB.id)
+        entry = self.operationCache.get(key)
+        if entry is not None:
+            return entry[:2]
 
         ruleIndex = { }
-        splitVar = min(nodeA.variable, nodeB.variable)  
+        splitVar = nodeA.variable if nodeA.variable.level <= nodeB.variable.level else nodeB.variable
         highA = nodeA.branchHigh(splitVar)
         lowA =  nodeA.branchLow(splitVar)
         highB = nodeB.branchHigh(splitVar) 
@@ -678,86 +880,124 @@ class Manager:
         return fun
 
     # Use clause to provide canonical list of nodes.  Should all be positive
+    # Iterative, with task stack entries (combine, node, clause)
     def equant(self, node, clause, topLevel = True):
         if topLevel:
             nextc = clause
             while not nextc.isLeaf():
-                self.quantifiedVariableSet.add(nextc.variable)
+                level = nextc.variable.level
+                if not self.quantifiedLevels[level]:
+                    self.quantifiedLevels[level] = 1
+                    self.quantifiedCount += 1
                 nextc = nextc.low
-        if node.isLeaf():
-            return node
-        while not clause.isLeaf() and node.variable > clause.variable:
-            clause = clause.low
-        if clause.isLeaf():
-            return node
-        key = ("equant", node.id, clause.id)
+        tasks = [(False, node, clause)]
+        results = []
+        cache = self.simpleCache
+        added = 0
+        while len(tasks) > 0:
+            combine, node, clause = tasks.pop()
+            if combine:
+                key = operationKey(opEquant, node.id, clause.id)
+                newLow = results.pop()
+                newHigh = results.pop()
+                if newHigh == newLow:
+                    newNode = newHigh
+                else:
+                    quant = node.variable.level == clause.variable.level
+                    newNode = self.applyOr(newHigh, newLow) if quant else self.findOrMake(node.variable, newHigh, newLow)
+                self.addSimple(key, newNode)
+                added += 1
+                results.append(newNode)
+                continue
+            if node.isLeaf():
+                results.append(node)
+                continue
+            while not clause.isLeaf() and node.variable.level > clause.variable.level:
+                clause = clause.low
+            if clause.isLeaf():
+                results.append(node)
+                continue
+            key = operationKey(opEquant, node.id, clause.id)
         
-        if key in self.operationCache:
-            return self.operationCache[key][0]
+            result = cache.get(key)
+            if result is not None:
+                cache.move_to_end(key)
+                results.append(result)
+                continue
 
-        newHigh = self.equant(node.high, clause, topLevel = False)
-        newLow = self.equant(node.low, clause, topLevel = False)
-        if newHigh == newLow:
-            newNode = newHigh
-        else:
-            quant = node.variable == clause.variable
-            newNode = self.applyOr(newHigh, newLow) if quant else self.findOrMake(node.variable, newHigh, newLow)
-        self.operationCache[key] = (newNode, resolver.tautologyId,[])
-        self.cacheNoJustifyAdded += 1
-        return newNode
+            tasks.append((True, node, clause))
+            tasks.append((False, node.low, clause))
+            tasks.append((False, node.high, clause))
+        self.cacheNoJustifyAdded += added
+        return results[0]
             
     # Should a GC be triggered?
     def checkGC(self):
-        newQuants = len(self.quantifiedVariableSet) - self.lastGC
+        newQuants = self.quantifiedCount - self.lastGC
         if newQuants > self.gcThreshold:
             return self.collectGarbage([])
         return []
 
 
-    # Create set nodes that should not be collected
+    # Mark nodes that should not be collected with current GC version
     # Maintain frontier of marked nonleaf nodes
+    # Return set of ids of marked nodes
     def doMarking(self, frontier):
-        markedSet = set([])
+        self.gcVersion += 1
+        version = self.gcVersion
+        markedIds = set([])
+        frontier = deque(frontier)
         while len(frontier) > 0:
-            node = frontier[0]
-            frontier = frontier[1:]
-            if node in markedSet:
+            node = frontier.popleft()
+            if node.gcMark == version:
                 continue
-            markedSet.add(node)
-            if not node.high.isLeaf():
+            node.gcMark = version
+            markedIds.add(node.id)
+            if not node.high.isLeaf() and node.high.gcMark != version:
                 frontier.append(node.high)
-            if not node.low.isLeaf():
+            if not node.low.isLeaf() and node.low.gcMark != version:
                 frontier.append(node.low)
-        return markedSet
+        return markedIds
 
-    def cleanCache(self, markedSet):
+    # Rebuild caches, keeping only entries whose operands and result are marked
+    # Leaves are never marked.  Implication results are not nodes and are always removed
+    def cleanCache(self, markedIds):
         clauseList = []
-        markedIds = set([node.id for node in markedSet])
-        klist = list(self.operationCache.keys())
-        for k in klist:
-            kill = self.operationCache[k][0] not in markedSet
-            # Skip over operation name
-            for id in k[1:]:
-                kill = kill or id not in markedIds
-            if kill:
-                clist = self.operationCache[k][2]
-                clauseList += clist
-                self.cacheRemoved += 1
-                del self.operationCache[k]
+        version = self.gcVersion
+        newCache = {}
+        for k, v in self.operationCache.items():
+            # Skip over opcode
+            ids = k >> opBits
+            if (k & opMask) != opImply and v[0].gcMark == version and (ids >> idBits) in markedIds and (ids & idMask) in markedIds:
+                newCache[k] = v
+            else:
+                clauseList += v[2]
+        self.cacheRemoved += len(self.operationCache) - len(newCache)
+        self.operationCache = newCache
+        newCache = OrderedDict()
+        for k, v in self.simpleCache.items():
+            ids = k >> opBits
+            if v.gcMark == version and (ids >> idBits) in markedIds and (ids & idMask) in markedIds:
+                newCache[k] = v
+        self.cacheRemoved += len(self.simpleCache) - len(newCache)
+        self.simpleCache = newCache
         return clauseList
         
-    def cleanNodes(self, markedSet):
+    # Rebuild unique table, keeping only marked nodes
+    def cleanNodes(self):
         clauseList = []
-        klist = list(self.uniqueTable.keys())
-        for k in klist:
-            node = self.uniqueTable[k]
+        version = self.gcVersion
+        newTable = {}
+        for k, node in self.uniqueTable.items():
             # If node is marked, then its children will be, too
-            if node not in markedSet:
+            if node.gcMark == version:
+                newTable[k] = node
+            else:
                 clist = [node.inferTrueUp, node.inferFalseUp, node.inferTrueDown, node.inferFalseDown]
                 clist = [c for c in clist if abs(c) != resolver.tautologyId]
                 clauseList += clist
-                self.nodesRemoved += 1
-                del self.uniqueTable[k]
+        self.nodesRemoved += len(self.uniqueTable) - len(newTable)
+        self.uniqueTable = newTable
         return clauseList
 
 
@@ -769,11 +1009,13 @@ class Manager:
             frontier += self.rootGenerator()
         frontier = [r for r in frontier if not r.isLeaf()]
         # Marking phase
-        markedSet = self.doMarking(frontier)
-        clauseList = self.cleanCache(markedSet)
-        clauseList += self.cleanNodes(markedSet)
+        markedIds = self.doMarking(frontier)
+        clauseList = self.cleanCache(markedIds)
+        clauseList += self.cleanNodes()
+        self.supportCache = {}
+        self.countCache = {}
         # Turn off trigger for garbage collection
-        self.lastGC = len(self.quantifiedVariableSet)
+        self.lastGC = self.quantifiedCount
         self.gcCount += 1
         return clauseList
 
@@ -781,7 +1023,7 @@ class Manager:
     def summarize(self):
         if self.verbLevel >= 1:
             self.writer.write("Input variables: %d\n" % self.variableCount)
-            self.writer.write("Variables quantified out: %d\n" % len(self.quantifiedVariableSet))
+            self.writer.write("Variables quantified out: %d\n" % self.quantifiedCount)
             self.writer.write("Total nodes: %d\n" % self.nodeCount)
             self.writer.write("Total nodes removed by gc: %d\n" % self.nodesRemoved)
             self.writer.write("Maximum live nodes: %d\n" % self.maxLiveCount)
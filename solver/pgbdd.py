@@ -26,6 +26,9 @@
 import sys
 import getopt
 import datetime
+import heapq
+import array
+from collections import deque, OrderedDict
 
 import bdd
 import resolver
@@ -55,9 +58,7 @@ def usage(name):
 # 5: Tree generation information
 
 def trim(s):
-    while len(s) > 0 and s[-1] in '\r\n':
-        s = s[:-1]
-    return s
+    return s.rstrip('\r\n')
 
 class CnfException(Exception):
 
@@ -101,22 +102,27 @@ class CnfReader():
         lineNumber = 0
         nclause = 0
         self.nvar = 0
+        nvar = 0
         clauseCount = 0
-        for line in self.file:
+        clauses = self.clauses
+        saveComments = self.verbLevel > 1
+        # Read entire file at once rather than line by line.  Lines have no line terminators
+        for line in self.file.read().splitlines():
             lineNumber += 1
-            line = trim(line)
             if len(line) == 0:
                 continue
-            elif line[0] == 'c':
-                if self.verbLevel > 1:
+            first = line[0]
+            if first == 'c':
+                if saveComments:
                     self.commentLines.append(line)
-            elif line[0] == 'p':
+            elif first == 'p':
                 fields = line[1:].split()
                 if fields[0] != 'cnf':
                     raise CnfException("Line %d.  Bad header line '%s'.  Not cnf" % (lineNumber, line))
                 try:
-                    self.nvar = int(fields[1])
+                    nvar = int(fields[1])
                     nclause = int(fields[2])
+                    self.nvar = nvar
                 except Exception:
                     raise CnfException("Line %d.  Bad header line '%s'.  Invalid number of variables or clauses" % (lineNumber, line))
             else:
@@ -130,16 +136,16 @@ class CnfReader():
                 # Last one should be 0
                 if lits[-1] != 0:
                     raise CnfException("Line %d.  Clause line should end with 0" % lineNumber)
-                lits = lits[:-1]
-                vars = sorted([abs(l) for l in lits])
-                if len(vars) == 0:
+                lits.pop()
+                if len(lits) == 0:
                     raise CnfException("Line %d.  Empty clause" % lineNumber)                    
-                if vars[-1] > self.nvar or vars[0] == 0:
+                vars = {abs(l) for l in lits}
+                if max(vars) > nvar or 0 in vars:
                     raise CnfException("Line %d.  Out-of-range literal" % lineNumber)
-                for i in range(len(vars) - 1):
-                    if vars[i] == vars[i+1]:
-                        raise CnfException("Line %d.  Opposite or repeated literal" % lineNumber)
-                self.clauses.append(lits)
+                # Set collapses opposite or repeated literals
+                if len(vars) != len(lits):
+                    raise CnfException("Line %d.  Opposite or repeated literal" % lineNumber)
+                clauses.append(lits)
                 clauseCount += 1
         if clauseCount != nclause:
             raise CnfException("Line %d: Got %d clauses.  Expected %d" % (lineNumber, clauseCount, nclause))
@@ -147,49 +153,54 @@ class CnfReader():
 
 # Abstract representation of Boolean function
 class Term:
-
-    manager = None
-    root = None
-#    support = None    # Variables in support represented by clause (omitted)
-    size = 0
-    validation = None # Clause id providing validation
+    # manager
+    # root
+    # support: Variables in support represented by clause (omitted)
+    # size
+    # validation: Clause id providing validation
+    # level: Level of root variable (cached for bucket placement)
+    __slots__ = ('manager', 'root', 'size', 'validation', 'level')
 
     def __init__(self, manager, root, validation):
         self.manager = manager
         self.root = root
+        self.level = root.variable.level
 #        self.support = self.manager.getSupport(root)
         self.size = self.manager.getSize(root)
         self.validation = validation
 
     # Generate conjunction of two terms
     def combine(self, other):
-        validation = None
-        antecedents = [self.validation, other.validation]
         newRoot, implication = self.manager.applyAndJustify(self.root, other.root)
-        if newRoot == self.manager.leaf0:
-            comment = "Validation of Empty clause"
-        else:
-            comment = "Validation of %s" % newRoot.label()
         if implication == resolver.tautologyId:
-            if newRoot == self.root:
-                validation = self.validation
-            elif newRoot == other.root:
-                validation = other.validation
+            if newRoot is self.root:
+                return Term(self.manager, newRoot, self.validation)
+            elif newRoot is other.root:
+                return Term(self.manager, newRoot, other.validation)
+            antecedents = [self.validation, other.validation]
         else:
-            antecedents += [implication]
-        if validation is None:
-            validation = self.manager.prover.createClause([newRoot.id], antecedents, comment)
+            antecedents = [self.validation, other.validation, implication]
+        prover = self.manager.prover
+        comment = None
+        if prover.commenting():
+            if newRoot is self.manager.leaf0:
+                comment = "Validation of Empty clause"
+            else:
+                comment = "Validation of %s" % newRoot.label()
+        validation = prover.createClause([newRoot.id], antecedents, comment)
         return Term(self.manager, newRoot, validation)
 
     def quantify(self, literals, prover):
-        antecedents = [self.validation]
         newRoot = self.manager.equant(self.root, literals)
         check, implication = self.manager.justifyImply(self.root, newRoot)
         if not check:
             raise bdd.BddException("Implication failed %s -/-> %s" % (self.root.label(), newRoot.label()))
-        if implication != resolver.tautologyId:
-            antecedents += [implication]
-        validation = self.manager.prover.createClause([newRoot.id], antecedents, "Validation of %s" % newRoot.label())
+        if implication == resolver.tautologyId:
+            antecedents = [self.validation]
+        else:
+            antecedents = [self.validation, implication]
+        comment = "Validation of %s" % newRoot.label() if prover.commenting() else None
+        validation = self.manager.prover.createClause([newRoot.id], antecedents, comment)
         return Term(self.manager, newRoot, validation)
 
     def equalityTest(self, other):
@@ -210,16 +221,34 @@ class PermutationException(Exception):
 class Permuter:
     forwardMap = {}
     reverseMap = {}
+    # When values are 1..n, maps are lists indexed by value (entry 0 unused)
+    forwardList = None
+    reverseList = None
     
     def __init__(self, valueList = [], permutedList = []):
         self.forwardMap = {}
         self.reverseMap = {}
+        self.forwardList = None
+        self.reverseList = None
         identity = False
         if len(permutedList) == 0:
             permutedList = valueList
             identity = True
         if len(valueList) != len(permutedList):
             raise PermutationException("Unequal list lengths: %d, %d" % (len(valueList), len(permutedList)))
+        n = len(valueList)
+        if self.denseValues(valueList, n) and (identity or self.denseRange(permutedList, n)):
+            self.forwardList = [0] + list(permutedList)
+            self.reverseList = [None] * (n+1)
+            for v, p in zip(valueList, permutedList):
+                self.reverseList[p] = v
+            if identity:
+                return
+            # Check permutation.  All values map somewhere, so only need to check range
+            for v in valueList:
+                if self.reverseList[v] is None:
+                    raise PermutationException("Not permutation: Nothing maps to %s" % str(v))
+            return
         for v, p in zip(valueList, permutedList):
             self.forwardMap[v] = p
             self.reverseMap[p] = v
@@ -232,19 +261,43 @@ class Permuter:
         for v in permutedList:
             if v not in self.forwardMap:
                 raise PermutationException("Not permutation: %s does not map anything" % str(v))
-            
+
+    # Are values exactly 1, 2, ..., n in order?
+    def denseValues(self, valueList, n):
+        for i in range(n):
+            v = valueList[i]
+            if type(v) is not int or v != i+1:
+                return False
+        return True
+
+    # Are all values integers in range 1..n?
+    def denseRange(self, permutedList, n):
+        for p in permutedList:
+            if type(p) is not int or p < 1 or p > n:
+                return False
+        return True
             
     def forward(self, v):
+        if self.forwardList is not None:
+            if type(v) is not int or v < 1 or v >= len(self.forwardList):
+                raise PermutationException("Value %s not in permutation" % (str(v)))
+            return self.forwardList[v]
         if v not in self.forwardMap:
             raise PermutationException("Value %s not in permutation" % (str(v)))
         return self.forwardMap[v]
 
     def reverse(self, v):
+        if self.reverseList is not None:
+            if type(v) is not int or v < 1 or v >= len(self.reverseList):
+                raise PermutationException("Value %s not in permutation range" % (str(v)))
+            return self.reverseList[v]
         if v not in self.reverseMap:
             raise PermutationException("Value %s not in permutation range" % (str(v)))
         return self.reverseMap[v]
     
     def __len__(self):
+        if self.forwardList is not None:
+            return len(self.forwardList) - 1
         return len(self.forwardMap)
         
 class ProverException(Exception):
@@ -281,7 +334,10 @@ class Prover:
     verbLevel = 1
     doLrat = False
     doBinary = False
-    clauseDict = {}  # Mapping from clause ID to list of literals in clause
+    clauseDict = {}  # Mapping from clause ID to array of literals in clause (excluding input clauses)
+    binaryBuffer = None  # Encoded binary proof steps not yet written
+    writeStep = None  # Method for writing proof step, chosen according to output format
+    bufferLimit = 64 * 1024  # Size of output buffers
 
     def __init__(self, fname = None, writer = None, verbLevel = 1, doLrat = False, doBinary = False):
         self.verbLevel = verbLevel
@@ -291,7 +347,7 @@ class Prover:
         else:
             self.opened = True
             try:
-                self.file = open(fname, 'wb' if doBinary else 'w')
+                self.file = open(fname, 'wb' if doBinary else 'w', buffering = self.bufferLimit)
             except Exception:
                 raise ProverException("Could not open file '%s'" % fname)
         self.writer = sys.stderr if writer is None else writer
@@ -300,6 +356,8 @@ class Prover:
         self.clauseCount = 0
         self.proofCount = 0
         self.clauseDict = {}
+        self.binaryBuffer = stream.CompressArray()
+        self.writeStep = self.writeBinary if doBinary else self.writeText
 
     def inputDone(self):
         self.inputClauseCount = self.clauseCount
@@ -307,11 +365,37 @@ class Prover:
     def fileOutput(self):
         return self.opened
 
+    # Will comments be included in the proof?
+    def commenting(self):
+        return self.verbLevel > 1 and not self.doBinary
+
     def comment(self, comment):
         if self.verbLevel > 1 and comment is not None and not self.doBinary:
             self.file.write("c " + comment + '\n')
 
+    # Input clauses have been checked by CnfReader: nonempty, with no repeated or opposite literals.
+    # Only need to order literals, and LRAT proofs don't include them
+    def createInputClause(self, result, comment = None):
+        self.comment(comment)
+        result = sorted(result, key = abs, reverse = True)
+        self.clauseCount += 1
+        if not self.doLrat or self.commenting():
+            ilist = [self.clauseCount]
+            if self.doBinary:
+                ilist.append(ord('a'))
+            ilist += result
+            ilist.append(0)
+            ilist.append(0)
+            if self.doLrat:
+                self.comment(" ".join([str(i) for i in ilist]))
+            else:
+                self.writeStep(ilist)
+        # Input clauses only serve as antecedents, so the resolver never needs their literals
+        return self.clauseCount
+
     def createClause(self, result, antecedent, comment = None, isInput = False):
+        if isInput:
+            return self.createInputClause(result, comment)
         self.comment(comment)
         result = resolver.cleanClause(result)
         if result == resolver.tautologyId:
@@ -319,26 +403,19 @@ class Prover:
         if result == -resolver.tautologyId:
             result = []
         self.clauseCount += 1
-        antecedent = list(antecedent)
         if not self.doLrat:
-            antecedent.sort()
-        middle = [ord('a')] if self.doBinary else []
-        rest = result + [0] + antecedent + [0]
-        ilist = [self.clauseCount] + middle + rest
+            antecedent = sorted(antecedent)
+        # Build step in place rather than concatenating temporary lists
+        ilist = [self.clauseCount]
         if self.doBinary:
-            if isInput and self.doLrat:
-                pass
-            else:
-                bytes = stream.CompressArray(ilist).bytes
-                self.file.write(bytes)
-        else:
-            slist = [str(i) for i in ilist]
-            istring = " ".join(slist)
-            if isInput and self.doLrat:
-                self.comment(istring)
-            else:
-                self.file.write(istring + '\n')
-        self.clauseDict[self.clauseCount] = result
+            ilist.append(ord('a'))
+        ilist += result
+        ilist.append(0)
+        ilist += antecedent
+        ilist.append(0)
+        self.writeStep(ilist)
+        # Compact storage: 4 bytes per literal rather than a list of int objects
+        self.clauseDict[self.clauseCount] = array.array('i', result)
         return self.clauseCount
 
     def deleteClauses(self, clauseList):
@@ -346,16 +423,25 @@ class Prover:
             del self.clauseDict[id]
         if not self.doLrat:
             return
-        middle = [ord('d')] if self.doBinary else ['d']
-        rest = clauseList + [0]
-        ilist = [self.clauseCount] + middle + rest
-        if self.doBinary:
-            bytes = stream.CompressArray(ilist).bytes
-            self.file.write(bytes)
-        else:
-            slist = [str(i) for i in ilist]
-            istring = " ".join(slist)
-            self.file.write(istring + '\n')
+        ilist = [self.clauseCount, ord('d') if self.doBinary else 'd']
+        ilist += clauseList
+        ilist.append(0)
+        self.writeStep(ilist)
+
+    def writeText(self, ilist):
+        self.file.write(" ".join([str(i) for i in ilist]) + '\n')
+
+    # Accumulate binary output, writing it out in large blocks
+    def writeBinary(self, ilist):
+        buffer = self.binaryBuffer
+        buffer.extend(ilist)
+        if len(buffer) >= self.bufferLimit:
+            self.flush()
+
+    def flush(self):
+        if self.binaryBuffer is not None and len(self.binaryBuffer) > 0:
+            self.file.write(self.binaryBuffer.bytes)
+            self.binaryBuffer = stream.CompressArray()
 
     def summarize(self):
         if self.verbLevel >= 1:
@@ -366,6 +452,7 @@ class Prover:
             self.writer.write("Added clauses requiring proofs: %d\n" % (self.proofCount))
 
     def __del__(self):
+        self.flush()
         if self.opened:
             self.file.close()
 
@@ -391,6 +478,8 @@ class Solver:
 
     # Dictionary of Ids of terms remaining to be combined
     activeIds = {}
+    # Min-heap of active Ids.  May contain stale or duplicate entries
+    idHeap = []
     # Dictionary of terms stored for later reuse.  Track so that don't get GCed
     storeTerms = {}
     # Dictionary of Ids of terms that are stored for reuse
@@ -400,6 +489,15 @@ class Solver:
     writer = None
     # Turn on to have information about node include number of solutions
     countSolutions = True
+    # Mapping from (smaller, larger) pair of root ids to conjoined term.
+    # LRU, so that it doesn't keep every intermediate term alive
+    combineCache = None
+    # Maximum number of terms held in each term cache
+    termCacheLimit = 1024
+    # Mapping from (root id, sorted tuple of variables) to quantified term.  Also LRU
+    quantifyCache = None
+    # Value of manager GC count when caches were last valid
+    cacheGC = 0
 
     def __init__(self, fname = None, prover = None, permuter = None, verbLevel = 1):
         self.verbLevel = verbLevel
@@ -445,51 +543,105 @@ class Solver:
         # Generate BDD representations of clauses
         self.termCount = 0
         self.activeIds = {}
+        self.idHeap = []
+        self.combineCache = OrderedDict()
+        self.quantifyCache = OrderedDict()
+        self.cacheGC = 0
         for clause in reader.clauses:
             self.termCount += 1
             litList = [self.litMap[v] for v in clause]
             root, validation = self.manager.constructClause(self.termCount, litList)
             term = Term(self.manager, root, validation)
-            self.activeIds[self.termCount] = term
+            self.activate(self.termCount, term)
         self.unsat = False
 
+    def activate(self, id, term):
+        self.activeIds[id] = term
+        heapq.heappush(self.idHeap, id)
+
+    # Pop smallest active Id from heap, skipping entries no longer active
+    def popActive(self, skip = None):
+        heap = self.idHeap
+        while True:
+            id = heapq.heappop(heap)
+            if id in self.activeIds and id != skip:
+                return id
+
     # Simplistic version of scheduling
     def choosePair(self):
-        ids = sorted(self.activeIds.keys())
-        return ids[0], ids[1]
+        id1 = self.popActive()
+        id2 = self.popActive(skip = id1)
+        return id1, id2
+
+    # Cached results may refer to collected nodes once GC has run
+    def checkCaches(self):
+        if self.manager.gcCount != self.cacheGC:
+            self.combineCache.clear()
+            self.quantifyCache.clear()
+            self.cacheGC = self.manager.gcCount
+
+    # Term caches are LRU, bounded by termCacheLimit
+    def lookupTerm(self, cache, key):
+        term = cache.get(key)
+        if term is not None:
+            cache.move_to_end(key)
+        return term
+
+    def addTerm(self, cache, key, term):
+        cache[key] = term
+        if len(cache) > self.termCacheLimit:
+            cache.popitem(last = False)
 
     def combineTerms(self, id1, id2):
-        termA = self.activeIds[id1]
-        termB = self.activeIds[id2]
-        newTerm = termA.combine(termB)
+        activeIds = self.activeIds
+        manager = self.manager
+        prover = self.prover
+        termA = activeIds[id1]
+        termB = activeIds[id2]
+        self.checkCaches()
+        idA = termA.root.id
+        idB = termB.root.id
+        key = (idA, idB) if idA < idB else (idB, idA)
+        newTerm = self.lookupTerm(self.combineCache, key)
+        if newTerm is None:
+            newTerm = termA.combine(termB)
+            self.addTerm(self.combineCache, key, newTerm)
         self.termCount += 1
-        comment = "T%d (Node %s) & T%d (Node %s)--> T%s (Node %s)" % (id1, termA.root.label(), id2, termB.root.label(),
-                                                                      self.termCount, newTerm.root.label())
-        self.prover.comment(comment)
-        del self.activeIds[id1]
-        del self.activeIds[id2]
-        if self.prover.fileOutput() and self.verbLevel >= 3:
-            self.writer.write(comment)
-        self.activeIds[self.termCount] = newTerm
-        if newTerm.root == self.manager.leaf0:
-            if self.prover.fileOutput() and self.verbLevel >= 1:
+        # Only format comment when it will be used
+        showComment = prover.fileOutput() and self.verbLevel >= 3
+        if showComment or prover.commenting():
+            comment = "T%d (Node %s) & T%d (Node %s)--> T%s (Node %s)" % (id1, termA.root.label(), id2, termB.root.label(),
+                                                                          self.termCount, newTerm.root.label())
+            prover.comment(comment)
+            if showComment:
+                self.writer.write(comment)
+        del activeIds[id1]
+        del activeIds[id2]
+        self.activate(self.termCount, newTerm)
+        if newTerm.root is manager.leaf0:
+            if prover.fileOutput() and self.verbLevel >= 1:
                 self.writer.write("UNSAT\n")
             self.unsat = True
-            self.manager.summarize()
+            manager.summarize()
             return -1
         return self.termCount
 
     def quantifyTerm(self, id, varList):
         term = self.activeIds[id]
-        litList = [self.litMap[v] for v in varList]
-        clause = self.manager.buildClause(litList)
-        newTerm = term.quantify(clause, self.prover)
+        self.checkCaches()
+        key = (term.root.id, tuple(sorted(varList)))
+        newTerm = self.lookupTerm(self.quantifyCache, key)
+        if newTerm is None:
+            litList = [self.litMap[v] for v in varList]
+            clause = self.manager.buildClause(litList)
+            newTerm = term.quantify(clause, self.prover)
+            self.addTerm(self.quantifyCache, key, newTerm)
         self.termCount += 1
         vstring = " ".join(sorted([str(v) for v in varList]))
         comment = "T%d (Node %s) EQuant(%s) --> T%d (Node %s)" % (id, term.root.label(), vstring, self.termCount, newTerm.root.label())
         self.prover.comment(comment)
         del self.activeIds[id]
-        self.activeIds[self.termCount] = newTerm
+        self.activate(self.termCount, newTerm)
         # This could be a good time for garbage collection
         clauseList = self.manager.checkGC()
         if len(clauseList) > 0:
@@ -505,7 +657,8 @@ class Solver:
 
     def runNoSchedule(self):
         nid = 0
-        while (len(self.activeIds) > 1):
+        activeIds = self.activeIds
+        while (len(activeIds) > 1):
             i, j = self.choosePair()
             nid = self.combineTerms(i, j)
             if nid < 0:
@@ -513,7 +666,7 @@ class Solver:
         if self.verbLevel >= 0:
             self.writer.write("SAT\n")
         if self.verbLevel >= 1:
-            for s in self.manager.satisfyStrings(self.activeIds[nid].root, limit = 20):
+            for s in self.manager.satisfyStrings(activeIds[nid].root, limit = 20):
                 self.writer.write("  " + s)
         
     def runSchedule(self, scheduler):
@@ -563,7 +716,7 @@ class Solver:
                 id, term = registerDict[name]
                 idStack.append(id)
                 # Reactivate
-                self.activeIds[id] = term
+                self.activate(id, term)
                 continue
             if cmd == 'd':  # Delete named register
                 if len(fields) != 2:
@@ -582,7 +735,7 @@ class Solver:
                     raise SolverException("Line #%d.  Need to items for implication test" % (lineCount))
                 term1 = self.activeIds[idStack[-1]]
                 term2 = self.activeIds[idStack[-2]]
-                idStack = idStack[:-2]
+                del idStack[-2:]
                 if term1.equalityTest(term2):
                     self.writer.write("Equality test PASSED.  %d == %d\n" % (term1.root.id, term2.root.id))
                 else:
@@ -593,16 +746,15 @@ class Solver:
             except:
                 raise SolverException("Line #%d.  Invalid field '%s'" % (lineCount, line))
             if cmd == 'c':  # Put listed clauses onto stack
-                idStack += values
+                idStack.extend(values)
             elif cmd == 'a':  # Pop n+1 clauses from stack.  Form their conjunction.  Push result back on stack
                 count = values[0]
                 if count+1 > len(idStack):
                     raise SolverException("Line #%d.  Invalid conjunction count %d.  Only have %d on stack" %
                                           (lineCount, count, len(idStack)))
                 for i in range(count):
-                    id1 = idStack[-1]
-                    id2 = idStack[-2]
-                    idStack = idStack[:-2]
+                    id1 = idStack.pop()
+                    id2 = idStack.pop()
                     nid = self.combineTerms(id1, id2)
                     if nid < 0:
                         # Hit unsat case
@@ -612,16 +764,14 @@ class Solver:
             elif cmd == 'q':
                 if len(idStack) < 1:
                     raise SolverException("Line #%d.  Stack is empty" % (lineCount))
-                id = idStack[-1]
-                idStack = idStack[:-1]
+                id = idStack.pop()
                 nid = self.quantifyTerm(id, values)
                 idStack.append(nid)
             else:
                 raise SolverException("Line %d.  Unknown scheduler action '%s'" % (lineCount, cmd))
         
     def placeInBucket(self, buckets, id):
-        term = self.activeIds[id]
-        level = term.root.variable.level
+        level = self.activeIds[id].level
         if level == bdd.Variable.leafLevel:
             buckets[0].append(id)
         else:
@@ -630,26 +780,25 @@ class Solver:
     # Bucket elimination
     def runBucketSchedule(self):
         maxLevel = len(self.manager.variables)
-        buckets = { level : [] for level in range(0, maxLevel + 1) }
+        buckets = { level : deque() for level in range(0, maxLevel + 1) }
         # Insert ids into lists according to top variable in BDD
         ids = sorted(self.activeIds.keys())
         for id in ids:
             self.placeInBucket(buckets, id)
         for blevel in range(0, maxLevel + 1):
             # Conjunct all terms in bucket
-            while len(buckets[blevel]) > 1:
-                id1 = buckets[blevel][0]
-                id2 = buckets[blevel][1]
-                buckets[blevel] = buckets[blevel][2:]
+            bucket = buckets[blevel]
+            while len(bucket) > 1:
+                id1 = bucket.popleft()
+                id2 = bucket.popleft()
                 newId = self.combineTerms(id1, id2)
                 if newId < 0:
                     # Hit unsat case
                     return
                 self.placeInBucket(buckets, newId)
             # Quantify top variable for this bucket
-            if blevel > 0 and len(buckets[blevel]) > 0:
-                id = buckets[blevel][0]
-                buckets[blevel] = []
+            if blevel > 0 and len(bucket) > 0:
+                id = bucket.popleft()
                 var = self.manager.variables[blevel-1]
                 vid = var.id
                 newId = self.quantifyTerm(id, [vid])
@@ -788,6 +937,7 @@ def run(name, args):
         solver.runSchedule(scheduler)
     else:
         solver.runNoSchedule()
+    prover.flush()
 
     delta = datetime.datetime.now() - start
     seconds = delta.seconds + 1e-6 * delta.microseconds
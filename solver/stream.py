@@ -23,19 +23,22 @@
 # Support for binary representation of proofs
 # and for communicating with proof server
 
-import binascii
 import sys
+import os
+import mmap
+import array
 
 class Logger:
-    outFile = None
+    # outFile: Log file, or None if only writing to stderr
+    __slots__ = ('outFile',)
 
     def __init__(self, outName = None):
         self.outFile = None
         if outName is not None:
             try:
                 self.outFile = open(outName, 'a')
-            except:
-                sys.stderr.write("Couldn't open log file '%s'\n", outName)
+            except Exception as ex:
+                sys.stderr.write("Couldn't open log file '%s' (%s)\n" % (outName, str(ex)))
                 self.outFile = None
 
     def write(self, text):
@@ -48,13 +51,27 @@ class Logger:
             self.outFile.close()
 
 
+# Decoded values of single-byte encodings
+byteValues = [u >> 1 if u & 0x1 == 0 else -(u >> 1) for u in range(128)]
+
 class CompressArray:
-    bytes = None
+    # bytes: Encoded values
+    __slots__ = ('bytes',)
+
+    def __init__(self, ilist = None):
+        self.bytes = bytearray()
+        if ilist is not None:
+            self.extend(ilist)
 
-    def __init__(self, ilist = []):
-        self.bytes = bytearray([])
+    # Encode entire list in a single loop, avoiding method call per value
+    def extend(self, ilist):
+        out = self.bytes
         for x in ilist:
-            self.append(x)
+            u = 2*x if x >= 0 else 2*(-x) + 1
+            while u >= 128:
+                out.append((u & 0x7F) + 128)
+                u = u >> 7
+            out.append(u)
 
     def append(self, x):
         u = 2*x if x >= 0 else 2*(-x) + 1
@@ -65,23 +82,14 @@ class CompressArray:
         self.bytes.append(u)
         
     def toList(self):
-        result = []
-        weight = 0
-        u = 0
-        for b in self.bytes:
-            ab = b & 0x7F;
-            u += ab << weight
-            if b < 128:
-                x = u//2 if u & 0x1 == 0 else -u//2
-                result.append(x)
-                weight = 0
-                u = 0
-            else:
-                weight += 7
-        return result
+        return list(decodeValues(self.bytes))
+
+    # Decode into array of 64-bit integers, avoiding a list of int objects
+    def toArray(self):
+        return array.array('q', decodeValues(self.bytes))
         
     def hexify(self):
-        return str(binascii.hexlify(self.bytes))
+        return self.bytes.hex()
 
     def __str__(self):
         return self.hexify()
@@ -89,4 +97,44 @@ class CompressArray:
     def __len__(self):
         return len(self.bytes)
 
-    
+    # Pickle as encoded bytes rather than through generic object state
+    def __reduce__(self):
+        return (fromBytes, (bytes(self.bytes),))
+
+# Construct CompressArray directly from encoded bytes
+def fromBytes(data):
+    carray = CompressArray()
+    carray.bytes = bytearray(data)
+    return carray
+
+# Generate values from binary file one at a time.
+# File is memory mapped, so that need not hold either its contents or the decoded list in memory
+def decodeFile(fname):
+    with open(fname, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        mm = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+        view = memoryview(mm)
+        try:
+            for x in decodeValues(view):
+                yield x
+        finally:
+            view.release()
+            mm.close()
+
+# Generate values encoded in sequence of bytes one at a time
+def decodeValues(data):
+    weight = 0
+    u = 0
+    for b in data:
+        if b < 128:
+            if weight == 0:
+                yield byteValues[b]
+                continue
+            u |= b << weight
+            yield u >> 1 if u & 0x1 == 0 else -(u >> 1)
+            weight = 0
+            u = 0
+        else:
+            u |= (b & 0x7F) << weight
+            weight += 7
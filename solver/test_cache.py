@@ -0,0 +1,114 @@
+# Checks on the term caches maintained by the solver
+# Usage: test_cache.py [CHECKER]
+
+import os
+import sys
+import subprocess
+import tempfile
+
+import pgbdd
+
+checker = "../lrat/lrat-check"
+
+# Write CNF file with given clauses, returning its name
+def writeCnf(dirName, nvar, clauses):
+    fname = os.path.join(dirName, "test.cnf")
+    outfile = open(fname, 'w')
+    outfile.write("p cnf %d %d\n" % (nvar, len(clauses)))
+    for clause in clauses:
+        outfile.write(" ".join([str(lit) for lit in clause + [0]]) + "\n")
+    outfile.close()
+    return fname
+
+# Chain of binary clauses (x_i | x_i+1)
+def chainClauses(nvar):
+    return [[v, v+1] for v in range(1, nvar)]
+
+# Unsatisfiable formula in which clauses 3 and 4 duplicate clauses 1 and 2
+dupClauses = [[1, 2], [-1, 3], [1, 2], [-1, 3], [-2], [-3]]
+
+def makeSolver(dirName, nvar, clauses):
+    cnfName = writeCnf(dirName, nvar, clauses)
+    prover = pgbdd.Prover(os.path.join(dirName, "test.lrat"), verbLevel = 0, doLrat = True)
+    return pgbdd.Solver(cnfName, prover = prover, verbLevel = 0)
+
+# Run proof through checker, returning True if it is verified
+def checkProof(dirName, solver):
+    solver.prover.flush()
+    solver.prover.file.close()
+    p = subprocess.run([checker, os.path.join(dirName, "test.cnf"), os.path.join(dirName, "test.lrat")],
+                       stdout = subprocess.PIPE, universal_newlines = True)
+    return p.returncode == 0 and "c VERIFIED" in p.stdout
+
+# Combine and quantify the duplicated clauses, so that the second copy of each operation
+# could reuse the result for the first.  The first quantified term is consumed, and
+# another quantification made, before repeating the quantification.  Then derive the empty clause
+# Return whether the second combination and the second quantification were cache hits
+def runDuplicates(solver):
+    activeIds = solver.activeIds
+    t7 = solver.combineTerms(1, 2)
+    t8 = solver.combineTerms(3, 4)
+    combineHit = activeIds[t7] is activeIds[t8]
+    t9 = solver.quantifyTerm(t7, [1])
+    term9 = activeIds[t9]
+    t10 = solver.combineTerms(t9, 5)
+    t11 = solver.quantifyTerm(t10, [2])
+    t12 = solver.quantifyTerm(t8, [1])
+    quantifyHit = activeIds[t12] is term9
+    t13 = solver.combineTerms(t12, 6)
+    solver.combineTerms(t13, t11)
+    return (combineHit, quantifyHit)
+
+def test_combine_cache_bounded():
+    with tempfile.TemporaryDirectory() as dirName:
+        solver = makeSolver(dirName, 100, chainClauses(100))
+        solver.termCacheLimit = 8
+        solver.runNoSchedule()
+        # No quantification, so GC never clears the cache
+        assert solver.manager.gcCount == 0
+        assert len(solver.combineCache) == solver.termCacheLimit
+
+def test_quantify_cache_bounded():
+    with tempfile.TemporaryDirectory() as dirName:
+        nvar = 100
+        solver = makeSolver(dirName, nvar, chainClauses(nvar))
+        solver.termCacheLimit = 8
+        # Never reaches GC threshold
+        solver.manager.gcThreshold = nvar
+        # Quantify one variable out of each input term
+        for id in range(1, nvar):
+            solver.quantifyTerm(id, [id])
+        assert solver.manager.gcCount == 0
+        assert len(solver.quantifyCache) == solver.termCacheLimit
+
+# Terms taken from the caches must still have usable roots and validation clauses
+def test_cache_hits_valid():
+    with tempfile.TemporaryDirectory() as dirName:
+        solver = makeSolver(dirName, 3, dupClauses)
+        solver.manager.gcThreshold = 10
+        (combineHit, quantifyHit) = runDuplicates(solver)
+        assert solver.manager.gcCount == 0
+        assert combineHit and quantifyHit
+        assert solver.unsat
+        assert checkProof(dirName, solver)
+
+# Entries cached before a garbage collection must not be reused after it
+def test_cache_cleared_by_gc():
+    with tempfile.TemporaryDirectory() as dirName:
+        solver = makeSolver(dirName, 3, dupClauses)
+        # Collect after every quantification
+        solver.manager.gcThreshold = 0
+        (combineHit, quantifyHit) = runDuplicates(solver)
+        assert solver.manager.gcCount > 0
+        assert not quantifyHit
+        assert solver.unsat
+        assert checkProof(dirName, solver)
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        checker = sys.argv[1]
+    test_combine_cache_bounded()
+    test_quantify_cache_bounded()
+    test_cache_hits_valid()
+    test_cache_cleared_by_gc()
+    print("OK")